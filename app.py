@@ -1,15 +1,26 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import (
+    Flask, render_template, request, redirect, url_for, flash, session,
+    abort, jsonify
+)
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import delete, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
 from dotenv import load_dotenv
 import os
-import pandas as pd
-import requests
-from werkzeug.utils import secure_filename
+import sqlite3
+from functools import cache
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
 from flask_login import (
     LoginManager, login_user, login_required,
     logout_user, current_user
 )
-from models import db, Category, Contact, User
+from models import db, Category, Contact, User, normalize_phone, verify_password
+from migrations import upgrade_contacts
 
 # Load environment variables
 load_dotenv()
@@ -18,14 +29,72 @@ app = Flask(__name__)
 
 # App configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY') or "dev_secret_key"
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL') or 'sqlite:///database.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True}
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # Wait for a busy writer instead of failing with "database is locked"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {
+        'timeout': 15, 'check_same_thread': False
+    }
+else:
+    # In-memory SQLite uses StaticPool, which rejects pool_size
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] = 5
+
+# Keep compiled templates on disk so restarted workers skip re-parsing them
+JINJA_CACHE_DIR = os.path.join(app.instance_path, 'jinja_cache')
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+# Contacts shown per page on the contacts view
+CONTACTS_PER_PAGE = 50
+
+# Contacts buffered per INSERT while streaming an uploaded sheet
+UPLOAD_BATCH_SIZE = 1000
+
+# mnotify settings
+MNOTIFY_URL = "https://api.mnotify.com/api/sms/quick"
+SENDER_ID = os.getenv("SENDER_ID")
+MNOTIFY_API_KEY = os.getenv("MNOTIFY_API_KEY")
+
+# mnotify caps recipients per request, so large categories go out in chunks
+SMS_CHUNK_SIZE = 1000
+SMS_MAX_WORKERS = 8
+SMS_TIMEOUT = (3, 15)  # (connect, read) seconds
+
+# Caps in-flight mnotify posts across all concurrent send_sms requests
+_sms_slots = BoundedSemaphore(SMS_MAX_WORKERS)
 
 # Initialize database
 db.init_app(app)
 
+# Contact inserts rely on ON CONFLICT DO NOTHING, which only these support
+CONTACT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL and relaxed syncing so commits don't each wait on fsync."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
+# Create missing tables and bring older databases up to the current schema
+with app.app_context():
+    if db.engine.dialect.name not in CONTACT_INSERTS:
+        raise RuntimeError(
+            f"Unsupported database {db.engine.dialect.name!r}; "
+            "set DATABASE_URL to a SQLite or PostgreSQL database"
+        )
+    db.create_all()
+    upgrade_contacts()
+
 # --- ✅ Initialize Login Manager ---
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -35,7 +104,7 @@ login_manager.login_message_category = 'info'
 # --- Flask-Login user loader ---
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 
 @app.route('/')
@@ -47,7 +116,10 @@ def home():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    categories = Category.query.all()
+    # Plain (id, name) rows; the template needs nothing else
+    categories = db.session.execute(
+        select(Category.id, Category.name).order_by(Category.id)
+    ).all()
     return render_template('dashboard.html', categories=categories)
 
 
@@ -73,8 +145,13 @@ def add_category():
 @app.route('/delete_category/<int:id>', methods=['POST'])
 @login_required
 def delete_category(id):
-    category = Category.query.get(id)
+    category = db.session.get(Category, id)
     if category:
+        # Contacts are never loaded through the relationship; drop them in bulk
+        db.session.execute(
+            delete(Contact).where(Contact.category_id == id),
+            execution_options={'synchronize_session': False}
+        )
         db.session.delete(category)
         db.session.commit()
         flash("Category deleted successfully!", "success")
@@ -87,35 +164,111 @@ def delete_category(id):
 @app.route('/contacts/<int:category_id>')
 @login_required
 def view_contacts(category_id):
-    category = Category.query.get_or_404(category_id)
-    return render_template('contacts.html', category=category)
+    category = db.session.get(Category, category_id) or abort(404)
+    contacts = db.paginate(
+        select(Contact)
+        .where(Contact.category_id == category_id)
+        .order_by(Contact.id),
+        per_page=CONTACTS_PER_PAGE
+    )
+    return render_template('contacts.html', category=category, contacts=contacts)
+
+
+def _sheet_rows(source):
+    """Yield the first sheet's rows from a path or seekable binary file.
+
+    python-calamine parses XLSX in native code; openpyxl's read-only mode is
+    the fallback when it isn't installed.
+    """
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError:
+        from openpyxl import load_workbook
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+        return
+
+    workbook = CalamineWorkbook.from_object(source)
+    try:
+        yield from workbook.get_sheet_by_index(0).iter_rows()
+    finally:
+        workbook.close()
+
+
+def _value_text(value):
+    """Return a cell or JSON value as text, or None when it is empty."""
+    if value is None:
+        return None
+    # Excel (and JSON) numbers arrive as floats; drop the trailing '.0'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _cell_text(row, col):
+    """Return a sheet cell as text, or None when it is empty or missing."""
+    if col is None or col >= len(row):
+        return None
+    return _value_text(row[col])
+
+
+def _insert_contact_batch(category_id, names, phones):
+    """Normalise a batch of phone numbers, insert it and return the rows added."""
+    records = [
+        {'name': name, 'phone': digits, 'category_id': category_id}
+        for name, digits in zip(names, map(normalize_phone, phones))
+        if digits
+    ]
+    if not records:
+        return 0
+    # Let the (category_id, phone) unique index drop numbers already stored
+    insert = CONTACT_INSERTS[db.session.get_bind().dialect.name]
+    stmt = insert(Contact.__table__).on_conflict_do_nothing(
+        index_elements=['category_id', 'phone']
+    )
+    return db.session.execute(stmt, records).rowcount
 
 
 @app.route('/upload_contacts/<int:category_id>', methods=['POST'])
 @login_required
 def upload_contacts(category_id):
-    category = Category.query.get_or_404(category_id)
+    category = db.session.get(Category, category_id) or abort(404)
     file = request.files['file']
 
     if not file:
         flash("No file selected!", "danger")
         return redirect(url_for('view_contacts', category_id=category_id))
 
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
-
+    added = 0
     try:
-        df = pd.read_excel(filepath)
-        for _, row in df.iterrows():
-            if 'Phone' in df.columns:
-                phone = str(row['Phone'])
-                name = row['Name'] if 'Name' in df.columns else None
-                new_contact = Contact(name=name, phone=phone, category_id=category.id)
-                db.session.add(new_contact)
+        # Parse straight from the upload stream; nothing is written to disk
+        with closing(_sheet_rows(file.stream)) as rows:
+            header = next(rows, ())
+            columns = [_cell_text(header, i) for i in range(len(header))]
+            if 'Phone' in columns:
+                phone_col = columns.index('Phone')
+                name_col = columns.index('Name') if 'Name' in columns else None
+                names, phones = [], []
+                for row in rows:
+                    phone = _cell_text(row, phone_col)
+                    if not phone:
+                        continue
+                    # Contact.name is NOT NULL; a blank Name cell stores ''
+                    names.append(_cell_text(row, name_col) or '')
+                    phones.append(phone)
+                    if len(phones) >= UPLOAD_BATCH_SIZE:
+                        added += _insert_contact_batch(category.id, names, phones)
+                        names.clear()
+                        phones.clear()
+                if phones:
+                    added += _insert_contact_batch(category.id, names, phones)
         db.session.commit()
-        flash("Contacts uploaded successfully!", "success")
+        flash(f"Contacts uploaded successfully! {added} new contact(s) added.", "success")
     except Exception as e:
+        db.session.rollback()
         flash(f"Error uploading contacts: {e}", "danger")
 
     return redirect(url_for('view_contacts', category_id=category_id))
@@ -124,17 +277,22 @@ def upload_contacts(category_id):
 @app.route('/add_contact/<int:category_id>', methods=['POST'])
 @login_required
 def add_contact(category_id):
-    category = Category.query.get_or_404(category_id)
+    category = db.session.get(Category, category_id) or abort(404)
     name = request.form.get('name')
-    phone = request.form.get('phone')
+    phone = normalize_phone(request.form.get('phone'))
 
-    if not phone.strip():
+    if not phone:
         flash("Phone number is required!", "danger")
         return redirect(url_for('view_contacts', category_id=category_id))
 
     new_contact = Contact(name=name, phone=phone, category_id=category.id)
     db.session.add(new_contact)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        flash("Contact already exists in this category!", "warning")
+        return redirect(url_for('view_contacts', category_id=category_id))
     flash("Contact added successfully!", "success")
     return redirect(url_for('view_contacts', category_id=category_id))
 
@@ -142,18 +300,29 @@ def add_contact(category_id):
 @app.route('/edit_contact/<int:contact_id>', methods=['POST'])
 @login_required
 def edit_contact(contact_id):
-    contact = Contact.query.get_or_404(contact_id)
+    contact = db.session.get(Contact, contact_id) or abort(404)
+    category_id = contact.category_id
+    phone = normalize_phone(request.form.get('phone'))
+    if not phone:
+        flash("Phone number is required!", "danger")
+        return redirect(url_for('view_contacts', category_id=category_id))
+
     contact.name = request.form.get('name')
-    contact.phone = request.form.get('phone')
-    db.session.commit()
+    contact.phone = phone
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        flash("Another contact in this category has that phone number!", "warning")
+        return redirect(url_for('view_contacts', category_id=category_id))
     flash("Contact updated successfully!", "success")
-    return redirect(url_for('view_contacts', category_id=contact.category_id))
+    return redirect(url_for('view_contacts', category_id=category_id))
 
 
 @app.route('/delete_contact/<int:contact_id>', methods=['POST'])
 @login_required
 def delete_contact(contact_id):
-    contact = Contact.query.get_or_404(contact_id)
+    contact = db.session.get(Contact, contact_id) or abort(404)
     category_id = contact.category_id
     db.session.delete(contact)
     db.session.commit()
@@ -161,42 +330,130 @@ def delete_contact(contact_id):
     return redirect(url_for('view_contacts', category_id=category_id))
 
 
+# --- Bulk contact operations (JSON) ---
+def _valid_bulk_contact(contact):
+    """Accept {name: str | null, phone: str | number} objects only."""
+    if not isinstance(contact, dict):
+        return False
+    name, phone = contact.get('name'), contact.get('phone')
+    return (
+        (name is None or isinstance(name, str))
+        and isinstance(phone, (str, int, float))
+        and not isinstance(phone, bool)
+    )
+
+
+@app.route('/bulk_add_contacts/<int:category_id>', methods=['POST'])
+@login_required
+def bulk_add_contacts(category_id):
+    db.session.get(Category, category_id) or abort(404)
+    contacts = request.get_json(silent=True)
+    if not isinstance(contacts, list) or not all(map(_valid_bulk_contact, contacts)):
+        return jsonify(error="Expected a JSON array of {name, phone} objects"), 400
+
+    names = [c.get('name') or '' for c in contacts]
+    phones = [_value_text(c.get('phone')) or '' for c in contacts]
+    added = _insert_contact_batch(category_id, names, phones)
+    db.session.commit()
+    return jsonify(added=added)
+
+
+@app.route('/bulk_delete_contacts', methods=['POST'])
+@login_required
+def bulk_delete_contacts():
+    ids = request.get_json(silent=True)
+    # bool is an int subclass; don't let `true` delete contact 1
+    if not isinstance(ids, list) or not all(
+        isinstance(i, int) and not isinstance(i, bool) for i in ids
+    ):
+        return jsonify(error="Expected a JSON array of contact ids"), 400
+
+    result = db.session.execute(
+        delete(Contact).where(Contact.id.in_(ids)),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return jsonify(deleted=result.rowcount)
+
+
 # --- Send SMS ---
+@cache
+def _sms_session():
+    """Return the session shared by all sends, so TLS connections are reused."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4, pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3)
+    ))
+    return session
+
+
 @app.route('/send_sms/<int:category_id>', methods=['POST'])
 @login_required
 def send_sms(category_id):
-    category = Category.query.get_or_404(category_id)
+    import requests
+
     message = request.form.get('message')
-    sender_id = os.getenv("SENDER_ID")
-    api_key = os.getenv("MNOTIFY_API_KEY")
 
     if not message or not message.strip():
         flash("Message cannot be empty!", "danger")
-        return redirect(url_for('view_contacts', category_id=category.id))
+        return redirect(url_for('view_contacts', category_id=category_id))
 
-    contacts = [c.phone for c in category.contacts]
+    contacts = db.session.scalars(
+        select(Contact.phone).where(Contact.category_id == category_id)
+    ).all()
     if not contacts:
+        # Only look the category up when there is nothing to send
+        if db.session.scalar(
+            select(Category.id).where(Category.id == category_id)
+        ) is None:
+            abort(404)
         flash("No contacts found in this category!", "danger")
-        return redirect(url_for('view_contacts', category_id=category.id))
-
-    url = "https://api.mnotify.com/api/sms/quick"
-    payload = {
-        "key": api_key,
-        "recipient": contacts,
-        "sender": sender_id,
-        "message": message
-    }
+        return redirect(url_for('view_contacts', category_id=category_id))
 
-    try:
-        response = requests.post(url, json=payload)
-        if response.status_code == 200:
-            flash("Messages sent successfully!", "success")
-        else:
-            flash(f"Failed to send SMS: {response.text}", "danger")
-    except Exception as e:
-        flash(f"Error sending SMS: {e}", "danger")
+    chunks = [
+        contacts[i:i + SMS_CHUNK_SIZE]
+        for i in range(0, len(contacts), SMS_CHUNK_SIZE)
+    ]
+
+    def send_chunk(recipients):
+        """Post one chunk and return an error message, or None on success."""
+        payload = {
+            "key": MNOTIFY_API_KEY,
+            "recipient": recipients,
+            "sender": SENDER_ID,
+            "message": message
+        }
+        with _sms_slots:
+            try:
+                response = _sms_session().post(
+                    MNOTIFY_URL, json=payload, timeout=SMS_TIMEOUT
+                )
+            except requests.RequestException as e:
+                return f"Error sending SMS: {e}"
+        if response.status_code != 200:
+            return f"Failed to send SMS: {response.text}"
+        return None
+
+    # Chunks wait on the network, so post them side by side
+    workers = min(len(chunks), SMS_MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        errors = list(pool.map(send_chunk, chunks))
+
+    failures = [error for error in errors if error]
+    sent = sum(len(chunk) for chunk, error in zip(chunks, errors) if not error)
+    if not failures:
+        flash("Messages sent successfully!", "success")
+    elif sent:
+        flash(f"Sent to {sent} of {len(contacts)} contacts. {failures[0]}", "warning")
+    else:
+        flash(failures[0], "danger")
 
-    return redirect(url_for('view_contacts', category_id=category.id))
+    return redirect(url_for('view_contacts', category_id=category_id))
 
 
 # --- Login & Logout ---
@@ -205,9 +462,12 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        user = User.query.filter_by(username=username).first()
+        user = db.session.scalar(select(User).filter_by(username=username))
 
         if user and user.check_password(password):
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
             login_user(user)
             flash('Login successful!', 'success')
             return redirect(url_for('dashboard'))
@@ -225,6 +485,5 @@ def logout():
 
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True)
+    # Development server only; production runs under gunicorn (gunicorn.conf.py)
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1')
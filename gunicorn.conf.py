@@ -0,0 +1,21 @@
+import os
+
+# Picked up automatically by `gunicorn wsgi:app` from the project root
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+
+# Threads keep a worker busy while SMS and database calls wait on I/O
+worker_class = 'gthread'
+threads = 8
+
+# Import the app once in the master so workers fork with it loaded
+preload_app = True
+
+
+def post_fork(server, worker):
+    # The app connects to the database at import (schema upgrade), so each
+    # worker drops the inherited pool instead of sharing the master's sockets
+    from app import app, db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
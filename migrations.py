@@ -0,0 +1,65 @@
+"""Schema upgrades that db.create_all() can't apply to existing tables."""
+import re
+
+from sqlalchemy import delete, inspect, select, text, update
+
+from models import db, Contact, normalize_phone
+
+CONTACT_PHONE_INDEX = 'uq_contact_category_id_phone'
+
+# Old pandas uploads stored numeric cells as '233245551212.0'
+FLOAT_SUFFIX = re.compile(r'\.0+$')
+
+
+def _legacy_phone_digits(phone):
+    """Normalise a stored phone, dropping a pandas float suffix first."""
+    return normalize_phone(FLOAT_SUFFIX.sub('', (phone or '').strip()))
+
+
+def upgrade_contacts():
+    """Normalise stored phones, merge duplicates and add the unique index.
+
+    Does nothing once the index exists, so it is safe to run on every start.
+    """
+    indexes = inspect(db.engine).get_indexes('contact')
+    if any(index['name'] == CONTACT_PHONE_INDEX for index in indexes):
+        return
+
+    # Keep the oldest row per (category, digits-only phone)
+    kept, discarded, renames = {}, [], {}
+    rows = db.session.execute(
+        select(Contact.id, Contact.name, Contact.category_id, Contact.phone)
+        .order_by(Contact.id)
+    )
+    for contact_id, name, category_id, phone in rows:
+        digits = _legacy_phone_digits(phone)
+        if not digits:
+            # Blank cells were stored as 'nan'; there is no number to keep
+            discarded.append(contact_id)
+            continue
+        key = (category_id, digits)
+        if key not in kept:
+            kept[key] = {'id': contact_id, 'name': name, 'phone': digits}
+            if digits != phone:
+                renames[contact_id] = kept[key]
+            continue
+        discarded.append(contact_id)
+        # Don't lose a name that only the duplicate had
+        if not kept[key]['name'] and name:
+            kept[key]['name'] = name
+            renames[kept[key]['id']] = kept[key]
+
+    if discarded:
+        db.session.execute(
+            delete(Contact).where(Contact.id.in_(discarded)),
+            execution_options={'synchronize_session': False}
+        )
+    if renames:
+        db.session.execute(update(Contact), list(renames.values()))
+
+    # Superseded by the unique index, which leads with category_id
+    db.session.execute(text('DROP INDEX IF EXISTS ix_contact_category_id'))
+    for index in Contact.__table__.indexes:
+        index.create(db.session.connection(), checkfirst=True)
+    db.session.commit()
+
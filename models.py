@@ -1,15 +1,39 @@
+import re
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
 from flask_sqlalchemy import SQLAlchemy
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 
 db = SQLAlchemy()
+password_hasher = PasswordHasher()
+
+# Phones are stored as digits only so (category_id, phone) catches duplicates
+PHONE_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(phone):
+    """Strip everything but digits from a phone number."""
+    return PHONE_NON_DIGITS.sub('', phone or '')
+
+
+def verify_password(password_hash, password):
+    """Check a password against an argon2 hash or a legacy werkzeug hash."""
+    if not password_hash.startswith('$argon2'):
+        return check_password_hash(password_hash, password)
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 # Category model
 class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
-    contacts = db.relationship('Contact', backref='category', lazy=True)
+    contacts = db.relationship(
+        'Contact', back_populates='category', lazy='raise', passive_deletes=True
+    )
 
     def __repr__(self):
         return f'<Category {self.name}>'
@@ -20,6 +44,12 @@ class Contact(db.Model):
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(20), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    category = db.relationship('Category', back_populates='contacts', lazy='raise')
+
+    # Also serves lookups by category_id alone (leftmost column)
+    __table_args__ = (
+        db.Index('uq_contact_category_id_phone', 'category_id', 'phone', unique=True),
+    )
 
 
 
@@ -29,10 +59,15 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        if not self.password_hash.startswith('$argon2'):
+            return True
+        return password_hasher.check_needs_rehash(self.password_hash)
 
 
     def __repr__(self):
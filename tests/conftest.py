@@ -0,0 +1,50 @@
+import os
+
+# Must be set before the app is imported: the engine is built at import time
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import pytest
+from sqlalchemy import event
+
+from app import app as flask_app
+from models import db, User
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+    # No context is held open, so each request gets its own session
+    yield flask_app
+    with flask_app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """A test client logged in as an admin user."""
+    with app.app_context():
+        user = User(username='admin')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'secret'})
+    return client
+
+
+@pytest.fixture
+def statements(app):
+    """Collect every SQL statement the engine executes during a test."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
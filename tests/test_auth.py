@@ -0,0 +1,46 @@
+from sqlalchemy import select
+from werkzeug.security import generate_password_hash
+
+from models import db, User
+
+
+def _add_user(app, password_hash):
+    with app.app_context():
+        db.session.add(User(username='teacher', password_hash=password_hash))
+        db.session.commit()
+
+
+def _login(app, password):
+    return app.test_client().post(
+        '/login', data={'username': 'teacher', 'password': password}
+    )
+
+
+def test_legacy_werkzeug_hash_is_upgraded_to_argon2(app):
+    _add_user(app, generate_password_hash('secret'))
+
+    response = _login(app, 'secret')
+
+    assert response.headers['Location'] == '/dashboard'
+    with app.app_context():
+        stored = db.session.scalar(select(User.password_hash))
+    assert stored.startswith('$argon2')
+    assert _login(app, 'secret').headers['Location'] == '/dashboard'
+
+
+def test_wrong_password_is_rejected(app):
+    _add_user(app, generate_password_hash('secret'))
+
+    response = _login(app, 'guess')
+
+    assert response.status_code == 200
+    assert b'Invalid username or password' in response.data
+
+
+def test_malformed_argon2_hash_fails_login_instead_of_erroring(app):
+    _add_user(app, '$argon2id$v=19$garbage')
+
+    response = _login(app, 'secret')
+
+    assert response.status_code == 200
+    assert b'Invalid username or password' in response.data
@@ -0,0 +1,78 @@
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import select
+
+from models import db, Category, Contact
+
+
+@pytest.fixture
+def category_id(app):
+    with app.app_context():
+        category = Category(name='Class 1')
+        db.session.add(category)
+        db.session.commit()
+        return category.id
+
+
+def _stored(app):
+    with app.app_context():
+        return db.session.execute(
+            select(Contact.name, Contact.phone).order_by(Contact.id)
+        ).all()
+
+
+def test_bulk_add_normalises_and_skips_duplicates(app, client, category_id):
+    response = client.post(f'/bulk_add_contacts/{category_id}', json=[
+        {'name': 'Ama', 'phone': '024 123 4567'},
+        {'name': 'Ama again', 'phone': '024-123-4567'},
+        {'name': None, 'phone': 233241234567.0},
+        {'name': 'No digits', 'phone': 'n/a'},
+    ])
+
+    assert response.get_json() == {'added': 2}
+    assert _stored(app) == [('Ama', '0241234567'), ('', '233241234567')]
+
+
+@pytest.mark.parametrize('contact', [
+    {'name': ['x'], 'phone': '0244'},
+    {'name': {'first': 'x'}, 'phone': '0244'},
+    {'name': 'x', 'phone': {'x': 1}},
+    {'name': 'x', 'phone': True},
+    {'name': 'x'},
+    'x',
+])
+def test_bulk_add_rejects_malformed_contacts(app, client, category_id, contact):
+    response = client.post(f'/bulk_add_contacts/{category_id}', json=[contact])
+
+    assert response.status_code == 400
+    assert _stored(app) == []
+
+
+def test_bulk_delete_rejects_booleans(app, client, category_id):
+    client.post(f'/bulk_add_contacts/{category_id}', json=[{'phone': '0244'}])
+
+    assert client.post('/bulk_delete_contacts', json=[True]).status_code == 400
+    assert len(_stored(app)) == 1
+
+
+def test_upload_reports_rows_added(app, client, category_id):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Name', 'Phone'])
+    sheet.append(['Ama', 233241234567.0])
+    sheet.append(['Ama again', '233 24 123 4567'])
+    sheet.append(['Kofi', '020 303 0303'])
+    upload = BytesIO()
+    workbook.save(upload)
+    upload.seek(0)
+
+    response = client.post(
+        f'/upload_contacts/{category_id}',
+        data={'file': (upload, 'contacts.xlsx')},
+        follow_redirects=True,
+    )
+
+    assert b'2 new contact(s) added' in response.data
+    assert _stored(app) == [('Ama', '233241234567'), ('Kofi', '0203030303')]
@@ -0,0 +1,33 @@
+from sqlalchemy import select, text
+
+from migrations import CONTACT_PHONE_INDEX, upgrade_contacts
+from models import db, Category, Contact
+
+
+def test_upgrade_contacts_cleans_baseline_phones(app):
+    with app.app_context():
+        # Recreate the pre-index schema with rows as the pandas upload stored them
+        db.session.execute(text(f'DROP INDEX {CONTACT_PHONE_INDEX}'))
+        db.session.add(Category(id=1, name='Class 1'))
+        db.session.execute(
+            text('INSERT INTO contact (id, name, phone, category_id) '
+                 'VALUES (:id, :name, :phone, 1)'),
+            [
+                {'id': 1, 'name': '', 'phone': '233245551212.0'},
+                {'id': 2, 'name': 'Kofi', 'phone': '233245551212'},
+                {'id': 3, 'name': 'Blank', 'phone': 'nan'},
+                {'id': 4, 'name': 'Esi', 'phone': '020 303 0303'},
+                {'id': 5, 'name': 'Esi again', 'phone': '0203030303'},
+            ]
+        )
+        db.session.commit()
+
+        upgrade_contacts()
+
+        rows = db.session.execute(
+            select(Contact.id, Contact.name, Contact.phone).order_by(Contact.id)
+        ).all()
+        assert rows == [(1, 'Kofi', '233245551212'), (4, 'Esi', '0203030303')]
+        assert CONTACT_PHONE_INDEX in {
+            index['name'] for index in db.inspect(db.engine).get_indexes('contact')
+        }
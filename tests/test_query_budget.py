@@ -0,0 +1,45 @@
+from models import db, Category, Contact
+
+
+def _category_with_contacts(app, count):
+    with app.app_context():
+        category = Category(name='Class 1')
+        db.session.add(category)
+        db.session.flush()
+        db.session.add_all(
+            Contact(name=f'Parent {i}', phone=f'024{i:07d}', category_id=category.id)
+            for i in range(count)
+        )
+        db.session.commit()
+        return category.id
+
+
+def test_view_contacts_query_budget(app, client, statements):
+    category_id = _category_with_contacts(app, 120)
+    statements.clear()
+
+    response = client.get(f'/contacts/{category_id}')
+
+    assert response.status_code == 200
+    # user loader, category, page count, page rows
+    assert len(statements) == 4
+
+
+def test_send_sms_query_budget(app, client, statements, monkeypatch):
+    import app as app_module
+
+    class Sent:
+        status_code = 200
+        text = 'ok'
+
+    monkeypatch.setattr(
+        app_module._sms_session(), 'post', lambda *args, **kwargs: Sent()
+    )
+    category_id = _category_with_contacts(app, 2500)
+    statements.clear()
+
+    response = client.post(f'/send_sms/{category_id}', data={'message': 'Hello'})
+
+    assert response.status_code == 302
+    # user loader, recipient phones; no category or contact hydration
+    assert len(statements) == 2
@@ -0,0 +1,2 @@
+# WSGI entrypoint for gunicorn: `gunicorn wsgi:app`
+from app import app